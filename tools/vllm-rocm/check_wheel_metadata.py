@@ -15,6 +15,36 @@ import zipfile
 from pathlib import Path
 import re
 
+from packaging.requirements import InvalidRequirement, Requirement
+
+# Compiled once so the metadata is scanned by the C regex engine instead of
+# per-line startswith() dispatch in Python.
+_HEADER_RE = re.compile(r'(?m)^([A-Za-z-]+):\s*(.*)$')
+_PKG_NAME_RE = re.compile(r'^([A-Za-z0-9_.-]+)')
+
+# Custom ROCm wheels that must be pinned to exact versions. Matched as
+# substrings so derived names (pytorch-triton-rocm, triton-kernels) are
+# treated as critical too — one C-level scan instead of a Python loop
+CRITICAL_PACKAGES = ('torch', 'triton', 'torchvision', 'amdsmi')
+_CRITICAL_RE = re.compile('|'.join(map(re.escape, CRITICAL_PACKAGES)))
+
+# Operators that leave room for pip to pick a different version
+_LOOSE_OPERATORS = frozenset(('>=', '>', '<', '<=', '~=', '!='))
+
+
+def _specifier_operators(dep: str):
+    """
+    Parse a Requires-Dist entry once and return its set of specifier
+    operators, or None if it cannot be parsed.
+
+    Parsing with packaging avoids repeated substring scans over the entry
+    and is robust against operators appearing inside environment markers.
+    """
+    try:
+        return {spec.operator for spec in Requirement(dep).specifier}
+    except InvalidRequirement:
+        return None
+
 def extract_metadata(wheel_path: str):
     """Extract and parse METADATA from wheel."""
     wheel = Path(wheel_path)
@@ -26,120 +56,159 @@ def extract_metadata(wheel_path: str):
     print(f"Analyzing wheel: {wheel.name}\n")
 
     with zipfile.ZipFile(wheel, 'r') as zf:
-        # Find METADATA file (usually in vllm-*.dist-info/METADATA)
-        metadata_files = [f for f in zf.namelist() if f.endswith('/METADATA')]
-
-        if not metadata_files:
-            print("ERROR: No METADATA file found in wheel!", file=sys.stderr)
-            sys.exit(1)
-
-        metadata_content = zf.read(metadata_files[0]).decode('utf-8')
-
-    return metadata_content
+        # The dist-info directory name is derived from the wheel filename
+        # ({name}-{version}.dist-info/METADATA), so try a direct getinfo()
+        # lookup first instead of scanning the full namelist.
+        info = None
+        parts = wheel.name.split('-')
+        if len(parts) >= 2:
+            try:
+                info = zf.getinfo(f"{parts[0]}-{parts[1]}.dist-info/METADATA")
+            except KeyError:
+                pass
+
+        if info is None:
+            # Fall back to scanning the namelist (e.g. non-standard filename)
+            metadata_files = [f for f in zf.namelist() if f.endswith('/METADATA')]
+
+            if not metadata_files:
+                print("ERROR: No METADATA file found in wheel!", file=sys.stderr)
+                sys.exit(1)
+
+            info = zf.getinfo(metadata_files[0])
+
+        # Stream the member in 1 MiB blocks into a preallocated buffer
+        # instead of zf.read(), which builds a second full-size bytes object
+        # on top of the decompressed data.
+        if info.file_size == 0:
+            return ""
+
+        buf = bytearray(info.file_size)
+        view = memoryview(buf)
+        offset = 0
+        with zf.open(info) as f:
+            while offset < info.file_size:
+                n = f.readinto(view[offset:offset + 1048576])
+                if not n:
+                    break
+                offset += n
+
+    # Only the RFC-822 style headers are analyzed; the body after the first
+    # blank line is the package long-description (often an embedded README
+    # hundreds of KB long) and decoding it would be pure waste.
+    header_end = buf.find(b'\n\n', 0, offset)
+    if header_end == -1:
+        header_end = offset
+
+    return bytes(buf[:header_end]).decode('utf-8', 'replace')
 
 
 def analyze_dependencies(metadata: str):
     """Parse and display dependency information."""
-    lines = metadata.split('\n')
-
-    # Extract basic info
+    # Extract basic info and all Requires-Dist entries in one pass over the
+    # metadata, without materializing a line list
     name = None
     version = None
+    requires = []
 
-    for line in lines:
-        if line.startswith('Name: '):
-            name = line.split('Name: ', 1)[1].strip()
-        elif line.startswith('Version: '):
-            version = line.split('Version: ', 1)[1].strip()
-
-    print(f"Package: {name}")
-    print(f"Version: {version}")
-    print("\n" + "=" * 80)
+    for match in _HEADER_RE.finditer(metadata):
+        field, value = match.group(1), match.group(2)
+        if field == 'Requires-Dist':
+            dep = value.strip()
+            pkg_match = _PKG_NAME_RE.match(dep)
+            if pkg_match:
+                requires.append((pkg_match.group(1).lower(), dep))
+        elif field == 'Name' and name is None:
+            name = value.strip()
+        elif field == 'Version' and version is None:
+            version = value.strip()
 
-    # Extract all Requires-Dist entries
-    requires = []
-    for line in lines:
-        if line.startswith('Requires-Dist: '):
-            dep = line.split('Requires-Dist: ', 1)[1].strip()
-            requires.append(dep)
+    # Buffer the report and write it in one flush at the end, instead of one
+    # write syscall per line
+    out = []
 
-    print(f"\nTotal dependencies: {len(requires)}\n")
+    out.append(f"Package: {name}")
+    out.append(f"Version: {version}")
+    out.append("\n" + "=" * 80)
 
-    # Highlight critical packages
-    critical_packages = ['torch', 'triton', 'torchvision', 'amdsmi']
+    out.append(f"\nTotal dependencies: {len(requires)}\n")
 
-    print("=" * 80)
-    print("CRITICAL ROCM DEPENDENCIES (should be pinned to exact versions):")
-    print("=" * 80)
+    out.append("=" * 80)
+    out.append("CRITICAL ROCM DEPENDENCIES (should be pinned to exact versions):")
+    out.append("=" * 80)
 
     found_critical = []
-    for dep in requires:
-        pkg_name = re.match(r'^([a-zA-Z0-9_-]+)', dep)
-        if pkg_name:
-            pkg = pkg_name.group(1).lower()
-            if any(critical in pkg for critical in critical_packages):
-                found_critical.append(dep)
-
-                # Check if it's an exact pin (==)
-                if '==' in dep and not '>=' in dep and not '<=' in dep:
-                    print(f"✓ {dep}")
-                else:
-                    print(f"✗ {dep}  <-- NOT PINNED!")
+    critical_pinned = []
+    for pkg, dep in requires:
+        if _CRITICAL_RE.search(pkg):
+            found_critical.append(dep)
+
+            # Check if it's an exact pin (==)
+            operators = _specifier_operators(dep)
+            pinned = operators == {'=='}
+            critical_pinned.append(pinned)
+            if pinned:
+                out.append(f"✓ {dep}")
+            else:
+                out.append(f"✗ {dep}  <-- NOT PINNED!")
 
     if not found_critical:
-        print("WARNING: No torch/triton/torchvision/amdsmi found in dependencies!")
-        print("This means the pinning did NOT work!\n")
+        out.append("WARNING: No torch/triton/torchvision/amdsmi found in dependencies!")
+        out.append("This means the pinning did NOT work!\n")
 
-    print("\n" + "=" * 80)
-    print("OTHER DEPENDENCIES WITH LOOSE CONSTRAINTS:")
-    print("=" * 80)
+    out.append("\n" + "=" * 80)
+    out.append("OTHER DEPENDENCIES WITH LOOSE CONSTRAINTS:")
+    out.append("=" * 80)
 
     # Show dependencies with >= or > constraints that might cause issues
     loose_deps = []
-    for dep in requires:
+    for _, dep in requires:
         if dep not in found_critical:
             # Check if it has torch/triton in its own dependencies
-            if any(pkg in dep.lower() for pkg in critical_packages):
+            if _CRITICAL_RE.search(dep.lower()):
                 continue
 
             # Check for loose constraints
-            if '>=' in dep or '>' in dep or '<' in dep:
+            operators = _specifier_operators(dep)
+            if operators and operators & _LOOSE_OPERATORS:
                 loose_deps.append(dep)
 
     # Show first 10 loose dependencies
     for dep in loose_deps[:10]:
-        print(f"  {dep}")
+        out.append(f"  {dep}")
 
     if len(loose_deps) > 10:
-        print(f"  ... and {len(loose_deps) - 10} more")
+        out.append(f"  ... and {len(loose_deps) - 10} more")
 
-    print("\n" + "=" * 80)
-    print("DIAGNOSIS:")
-    print("=" * 80)
+    out.append("\n" + "=" * 80)
+    out.append("DIAGNOSIS:")
+    out.append("=" * 80)
 
     if found_critical:
-        all_pinned = all('==' in dep for dep in found_critical)
+        all_pinned = all(critical_pinned)
         if all_pinned:
-            print("✓ All critical ROCm packages are pinned to exact versions")
-            print("\nIf pip is still installing wrong versions, the issue is:")
-            print("  1. S3 index contains wrong wheel versions")
-            print("  2. Transitive dependencies (other packages) have loose constraints")
-            print("\nSolution:")
-            print("  - Rebuild and re-upload to clean S3")
-            print("  - Ensure only custom wheels are in S3 (latest Dockerfile.rocm fixes this)")
+            out.append("✓ All critical ROCm packages are pinned to exact versions")
+            out.append("\nIf pip is still installing wrong versions, the issue is:")
+            out.append("  1. S3 index contains wrong wheel versions")
+            out.append("  2. Transitive dependencies (other packages) have loose constraints")
+            out.append("\nSolution:")
+            out.append("  - Rebuild and re-upload to clean S3")
+            out.append("  - Ensure only custom wheels are in S3 (latest Dockerfile.rocm fixes this)")
         else:
-            print("✗ Some critical packages are NOT pinned to exact versions!")
-            print("\nThis means pin_rocm_dependencies.py didn't work correctly.")
-            print("\nCheck:")
-            print("  1. Does /install contain custom wheels during build?")
-            print("  2. Did pin_rocm_dependencies.py successfully modify requirements/rocm.txt?")
-            print("  3. Did setup.py read the modified requirements file?")
+            out.append("✗ Some critical packages are NOT pinned to exact versions!")
+            out.append("\nThis means pin_rocm_dependencies.py didn't work correctly.")
+            out.append("\nCheck:")
+            out.append("  1. Does /install contain custom wheels during build?")
+            out.append("  2. Did pin_rocm_dependencies.py successfully modify requirements/rocm.txt?")
+            out.append("  3. Did setup.py read the modified requirements file?")
     else:
-        print("✗ Critical ROCm packages NOT FOUND in dependencies!")
-        print("\nThis means vLLM wheel has no torch/triton dependencies at all,")
-        print("which is incorrect. Check:")
-        print("  1. Was VLLM_TARGET_DEVICE=rocm during build?")
-        print("  2. Did setup.py read requirements/rocm.txt?")
+        out.append("✗ Critical ROCm packages NOT FOUND in dependencies!")
+        out.append("\nThis means vLLM wheel has no torch/triton dependencies at all,")
+        out.append("which is incorrect. Check:")
+        out.append("  1. Was VLLM_TARGET_DEVICE=rocm during build?")
+        out.append("  2. Did setup.py read requirements/rocm.txt?")
+
+    sys.stdout.write('\n'.join(out) + '\n')
 
 
 def main():
@@ -9,68 +9,267 @@ by downloading multiple compatible versions.
 """
 
 import argparse
+import functools
+import json
+import logging
+import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import os
+import venv
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from packaging.requirements import Requirement
 from packaging.specifiers import SpecifierSet
+from packaging.utils import (
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
 from packaging.version import InvalidVersion, Version
 
+# Packages that should be built from source rather than downloaded from PyPI
+SKIP_PACKAGES = {
+    "torch",
+    "torchvision",
+    "torchaudio",
+    "triton",
+    "amdsmi",
+    "vllm",
+}
+
+# Concurrent PyPI metadata fetches (each is a small JSON GET, so the work is
+# almost entirely network latency)
+METADATA_FETCH_WORKERS = 16
+
+# On-disk cache for PyPI metadata responses, revalidated with HTTP
+# conditional requests so repeat runs get cheap 304s instead of full bodies
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "vllm-wheel-downloader"
+)
+
+
+# Content type for the PEP 691 JSON simple index
+_SIMPLE_JSON_ACCEPT = "application/vnd.pypi.simple.v1+json"
+
+# Shared session so all PyPI requests reuse pooled keep-alive connections
+# instead of paying a TCP+TLS handshake per package, with retries on
+# transient upstream errors
+# Pool is sized above the default worker count so callers raising the
+# prefetch concurrency still get pooled connections rather than discards
+_SESSION_POOL_SIZE = 32
+
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=_SESSION_POOL_SIZE,
+        pool_maxsize=_SESSION_POOL_SIZE,
+        max_retries=Retry(
+            total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+        ),
+    ),
+)
+_SESSION.headers["User-Agent"] = "vllm-wheel-downloader"
+
+
+def _fetch_json_cached(url: str, cache_key: str, accept: str = None) -> dict:
+    """
+    Fetch a JSON endpoint with a persistent cache.
+
+    The parsed response is stored under CACHE_DIR together with its ETag and
+    Last-Modified headers. On subsequent runs the request is made
+    conditionally (If-None-Match / If-Modified-Since); a 304 reuses the
+    cached body without re-downloading or re-parsing the full JSON.
+    """
+    cache_file = CACHE_DIR / f"{cache_key}.json"
+
+    cached = None
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+
+    headers = {}
+    if accept:
+        headers["Accept"] = accept
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = _SESSION.get(url, headers=headers, timeout=30)
+
+    if response.status_code == 304 and cached:
+        return cached["data"]
+
+    response.raise_for_status()
+    data = response.json()
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename keeps the cache entry atomic. The temp name
+        # carries pid and thread id: two prefetch threads can fetch the same
+        # package concurrently (lru_cache does not serialize first calls),
+        # and sharing one temp path would interleave their writes
+        tmp_file = cache_file.with_suffix(
+            f".tmp{os.getpid()}-{threading.get_ident()}"
+        )
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": data,
+                },
+                f,
+            )
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # Cache writes are best-effort; a read-only cache dir is not fatal
+        pass
+
+    return data
+
+
+@functools.lru_cache(maxsize=1024)
+def _fetch_available_versions(package_name: str) -> tuple[str, ...]:
+    """
+    Enumerate all released versions of a package from PyPI.
+
+    Uses the PEP 691 JSON simple index, which returns a compact file list,
+    instead of /pypi/{name}/json whose full release manifest (file URLs,
+    digests, upload times) is often hundreds of KB we never look at. Falls
+    back to the full JSON API if the simple index is unavailable.
+
+    Memoized per process: the same package can be looked up under several
+    specifiers (different extras, repeated -r includes) and the specifier
+    filter happens in the caller, so every lookup shares one network call.
+    """
+    try:
+        data = _fetch_json_cached(
+            f"https://pypi.org/simple/{package_name}/",
+            f"{package_name.lower()}-simple",
+            accept=_SIMPLE_JSON_ACCEPT,
+        )
+    except requests.HTTPError:
+        data = None
+
+    if data is not None:
+        # PEP 700 (API version 1.1+) includes the version list directly
+        if "versions" in data:
+            return tuple(data["versions"])
+
+        # Otherwise derive versions from the filenames in the file list
+        versions = set()
+        for file_info in data.get("files", []):
+            filename = file_info.get("filename", "")
+            try:
+                if filename.endswith(".whl"):
+                    _, version, _, _ = parse_wheel_filename(filename)
+                else:
+                    _, version = parse_sdist_filename(filename)
+            except Exception:
+                continue
+            versions.add(str(version))
+        return tuple(versions)
+
+    # Fallback: full package JSON
+    data = _fetch_json_cached(
+        f"https://pypi.org/pypi/{package_name}/json", package_name.lower()
+    )
+    return tuple(data["releases"].keys())
+
+
+@functools.lru_cache(maxsize=None)
+def _read_requirement_lines(resolved_path: str) -> tuple[str, ...]:
+    """Read one requirements file, memoized by its resolved path.
+
+    Returns the cleaned lines (including any -r directives) so that a file
+    included under several parents in the requirements/*.txt fan-out is only
+    read and parsed once per process.
+    """
+    lines = []
+    with open(resolved_path) as f:
+        for line in f:
+            # Strip inline comments in a single pass; partition() never
+            # builds a list the way split() does
+            line = line.partition('#')[0].strip()
+            if line:
+                lines.append(line)
+    return tuple(lines)
+
+
+def _iter_requirements(filepath: Path, seen: set) -> Iterator[str]:
+    """Yield requirement strings from a file, following -r includes."""
+    # Guard against include cycles, which would otherwise recurse forever
+    resolved = filepath.resolve()
+    if resolved in seen:
+        return
+    seen.add(resolved)
+
+    for line in _read_requirement_lines(str(resolved)):
+        # Handle -r includes recursively
+        if line.startswith("-r "):
+            included_file = filepath.parent / line[3:].strip()
+            yield from _iter_requirements(included_file, seen)
+        else:
+            yield line
+
 
 def parse_requirements_file(filepath: Path) -> list[str]:
     """Parse a requirements file and return list of requirement strings."""
-    requirements = []
+    # Generators avoid the intermediate list copied by extend() at every
+    # level of a nested -r include chain
+    return list(_iter_requirements(filepath, set()))
 
-    with open(filepath) as f:
-        for line in f:
-            line = line.strip()
-            # Skip comments and empty lines
-            if not line or line.startswith("#"):
-                continue
-            # Handle -r includes recursively
-            if line.startswith("-r "):
-                included_file = filepath.parent / line[3:].strip()
-                requirements.extend(parse_requirements_file(included_file))
-            else:
-                # Strip inline comments (everything after # that's not in quotes)
-                # Simple approach: split on # and take first part
-                if '#' in line:
-                    line = line.split('#')[0].strip()
-                if line:  # Only add if something remains after stripping
-                    requirements.append(line)
 
-    return requirements
+@functools.lru_cache(maxsize=8192)
+def _parse_version(ver_str: str) -> Version:
+    """Parse a version string, memoized across packages."""
+    return Version(ver_str)
+
+
+@functools.lru_cache(maxsize=8192)
+def _matches_specifier(spec_str: str, ver_str: str) -> bool:
+    """Memoized specifier-containment test keyed by the string forms."""
+    return _parse_version(ver_str) in SpecifierSet(spec_str)
 
 
 def get_pypi_package_versions(package_name: str, specifier: SpecifierSet) -> list[str]:
     """Get all versions of a package from PyPI that match the specifier."""
     try:
-        url = f"https://pypi.org/pypi/{package_name}/json"
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
         # Get all available versions
-        all_versions = list(data["releases"].keys())
-
-        # Filter versions that match the specifier
-        matching_versions = []
+        all_versions = _fetch_available_versions(package_name)
+
+        # Filter versions that match the specifier, keeping the parsed
+        # Version alongside the string so the sort below does not have to
+        # parse every version a second time. Common version strings and
+        # overlapping specifier ranges recur across packages, so both the
+        # parse and the containment test are memoized.
+        spec_str = str(specifier)
+        matching = []
         for ver_str in all_versions:
             try:
-                version = Version(ver_str)
-                if version in specifier:
-                    matching_versions.append(ver_str)
+                version = _parse_version(ver_str)
             except InvalidVersion:
                 continue
+            if _matches_specifier(spec_str, ver_str):
+                matching.append((version, ver_str))
 
         # Sort versions (newest first) and limit to avoid too many downloads
-        matching_versions.sort(key=lambda v: Version(v), reverse=True)
+        matching.sort(key=lambda pair: pair[0], reverse=True)
 
-        return matching_versions
+        return [ver_str for _, ver_str in matching]
     except Exception as e:
         print(
             f"Warning: Could not fetch versions for {package_name}: {e}",
@@ -90,140 +289,319 @@ def select_versions_to_download(
     if not versions:
         return []
 
-    if len(versions) <= max_versions:
+    n = len(versions)
+    if n <= max_versions:
         return versions
 
-    # Take the latest version, some middle versions, and oldest in the range
-    selected = [versions[0]]  # Latest
+    # Take the latest version, some evenly sampled middle versions, and the
+    # oldest in the range. Deduplicating the indices in a set makes the
+    # "oldest included" invariant explicit with no O(k) containment checks.
+    step = n // (max_versions - 1)
+    indices = {0, n - 1}
+    indices.update(min(i * step, n - 1) for i in range(1, max_versions - 1))
 
-    # Sample from the middle
-    step = len(versions) // (max_versions - 1)
-    for i in range(1, max_versions - 1):
-        idx = min(i * step, len(versions) - 1)
-        selected.append(versions[idx])
+    return [versions[i] for i in sorted(indices)]
 
-    # Add oldest in range
-    if versions[-1] not in selected:
-        selected.append(versions[-1])
 
-    return selected
+def prefetch_package_versions(
+    requirements: list[str], concurrency: int = METADATA_FETCH_WORKERS
+) -> dict[tuple[str, str], list[str]]:
+    """
+    Fetch matching PyPI versions for all requirements concurrently.
+
+    Processing requirements serially spends nearly all wall time waiting on
+    PyPI round-trips; fetching them up front with a thread pool collapses N
+    sequential latencies into roughly one batch. With the result dict in
+    hand, requirement resolution is pure CPU work over cached metadata.
+
+    Returns:
+        Dict mapping (package name, specifier string) pairs to their
+        matching version lists. The specifier is part of the key because
+        the same package can appear under different ranges across -r
+        includes, and each entry holds versions filtered against one range.
+    """
+    lookups = []
+    for req_string in requirements:
+        try:
+            req = Requirement(req_string)
+        except Exception:
+            # Invalid requirements are reported later by process_requirement
+            continue
+        if req.name.lower() in SKIP_PACKAGES:
+            continue
+        # Requirements whose marker does not apply to this environment are
+        # skipped entirely, so don't fetch their metadata either
+        if req.marker is not None and not req.marker.evaluate():
+            continue
+        specifier = req.specifier if req.specifier else SpecifierSet()
+        lookups.append((req.name, specifier))
 
+    if not lookups:
+        return {}
 
-def download_wheels(
-    package_name: str,
-    versions: list[str],
-    output_dir: Path,
-    python_version: str,
-    extras: list[str] = None,
-) -> None:
-    """Download wheels for specified versions of a package."""
-    output_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(
+            lambda args: get_pypi_package_versions(*args), lookups
+        )
+        return {
+            (name, str(spec)): versions
+            for (name, spec), versions in zip(lookups, results)
+        }
 
-    for version in versions:
-        # Construct package spec
-        if extras:
-            package_spec = f"{package_name}[{','.join(extras)}]=={version}"
-        else:
-            package_spec = f"{package_name}=={version}"
 
-        print(f"  Downloading {package_spec}...")
+# Concurrent pip download subprocesses per package; pip writes each wheel to
+# its own filename, so parallel downloads into one dest dir are safe.
+# Overridable for CI runners with more or less bandwidth.
+DOWNLOAD_WORKERS = int(os.environ.get("PIP_PARALLEL_DOWNLOADS", 8))
+
+# Hot-loop progress goes through logging: the handler serializes concurrent
+# workers behind its own lock, and per-spec chatter can be silenced entirely
+# by raising the level (it is emitted at DEBUG)
+log = logging.getLogger("dl")
+
+# uv (Rust) creates venvs and installs wheels far faster than pip; used
+# opportunistically when present on the runner, with pip as the fallback.
+# uv has no `pip download` equivalent, so the download phase stays on pip.
+_UV = shutil.which("uv")
+
+
+def _build_package_spec(
+    package_name: str, version: str = None, extras: list[str] = None
+) -> str:
+    """Construct a pip package spec like name[extras]==version."""
+    spec = package_name
+    if extras:
+        spec += f"[{','.join(extras)}]"
+    if version:
+        spec += f"=={version}"
+    return spec
+
+
+def _run_pip_download(
+    specs: list[str], output_dir: Path, timeout: int, no_deps: bool = False
+) -> bool:
+    """Run one pip download subprocess for the given specs."""
+    # Use pip download for current platform
+    # NOTE: no_deps skips the resolver entirely — only valid when the caller
+    #       fetches transitive dependencies in a separate pass
+    # NOTE: Not using --python-version or --platform because pip doesn't allow them
+    #       with dependency downloads. Instead, pip uses the current environment's
+    #       Python version and platform (which is correct for GitHub Actions runner)
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "download",
+        "--prefer-binary",
+        "--dest",
+        str(output_dir),
+    ]
+    if no_deps:
+        cmd.append("--no-deps")
+    cmd += specs
 
+    try:
+        # Discard pip's progress output instead of buffering it all in
+        # memory; stderr is only decoded when the download actually fails
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         try:
-            # Use pip download for current platform
-            # NOTE: Not using --no-deps to include all transitive dependencies
-            # NOTE: Not using --python-version or --platform because pip doesn't allow them
-            #       with dependency downloads. Instead, pip uses the current environment's
-            #       Python version and platform (which is correct for GitHub Actions runner)
-            cmd = [
-                sys.executable,
-                "-m",
-                "pip",
-                "download",
-                "--prefer-binary",
-                "--dest",
-                str(output_dir),
-                package_spec,
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-
-            if result.returncode != 0:
-                print(
-                    f"    Warning: Failed to download {package_spec}", file=sys.stderr
-                )
-                print(f"    Error: {result.stderr}", file=sys.stderr)
+            _, stderr = proc.communicate(timeout=timeout)
         except subprocess.TimeoutExpired:
-            print(f"    Warning: Timeout downloading {package_spec}", file=sys.stderr)
-        except Exception as e:
-            print(
-                f"    Warning: Error downloading {package_spec}: {e}", file=sys.stderr
+            proc.kill()
+            proc.communicate()
+            raise
+
+        if proc.returncode != 0:
+            log.warning(
+                "    Warning: Failed to download %s\n    Error: %s",
+                ' '.join(specs),
+                stderr.decode(errors='replace'),
             )
+            return False
+        return True
+    except subprocess.TimeoutExpired:
+        log.warning("    Warning: Timeout downloading %s", ' '.join(specs))
+    except Exception as e:
+        log.warning("    Warning: Error downloading %s: %s", ' '.join(specs), e)
+    return False
+
 
+def _partition_into_waves(specs: list[str]) -> list[list[str]]:
+    """Split specs into waves holding at most one version of each package.
 
-def process_requirement(
-    req_string: str, output_dir: Path, python_version: str, max_versions: int = 5
+    pip's resolver rejects two pins of the same package in one invocation
+    with ResolutionImpossible — even under --no-deps — so a flat batch
+    containing several versions per package (the normal output of
+    select_versions_to_download) can never succeed. Wave k gets the k-th
+    pin of every package, keeping the startup amortization of batching
+    without ever co-scheduling conflicting pins.
+    """
+    waves = []
+    seen_counts = {}
+    for spec in specs:
+        try:
+            name = canonicalize_name(Requirement(spec).name)
+        except Exception:
+            name = spec
+        idx = seen_counts.get(name, 0)
+        seen_counts[name] = idx + 1
+        if idx == len(waves):
+            waves.append([])
+        waves[idx].append(spec)
+    return waves
+
+
+def download_package_specs(
+    specs: list[str], output_dir: Path, no_deps: bool = False
 ) -> None:
-    """Process a single requirement and download appropriate wheels."""
+    """
+    Download wheels for the given package specs.
+
+    Specs are batched into pip invocations that each contain at most one
+    version of any package, amortizing pip's interpreter startup across
+    each wave. Only the specs of a failed wave (e.g. one unsatisfiable
+    spec aborting that invocation) fall back to per-spec downloads, so the
+    rest still succeed.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    waves = _partition_into_waves(specs)
+    print(
+        f"\nDownloading {len(specs)} package spec(s) in "
+        f"{len(waves)} pip invocation(s)..."
+    )
+
+    failed = []
+    for wave in waves:
+        if not _run_pip_download(
+            wave, output_dir, timeout=300 * max(1, len(wave) // 10), no_deps=no_deps
+        ):
+            failed.extend(wave)
+
+    if not failed:
+        return
+
+    print(
+        f"  Batched download failed for {len(failed)} spec(s), "
+        "retrying each individually...",
+        file=sys.stderr,
+    )
+
+    def download_one(package_spec: str) -> None:
+        log.debug("  Downloading %s...", package_spec)
+        _run_pip_download([package_spec], output_dir, timeout=300, no_deps=no_deps)
+
+    # Each spec is downloaded by an independent pip subprocess; run them
+    # concurrently so wall time is bounded by the slowest batch, not the sum
+    with ThreadPoolExecutor(
+        max_workers=min(DOWNLOAD_WORKERS, len(failed))
+    ) as executor:
+        list(executor.map(download_one, failed))
+
+
+def _scan_downloaded_wheels(output_dir: Path) -> set:
+    """Collect (canonical name, version) pairs for wheels already on disk."""
+    have = set()
+    try:
+        entries = os.scandir(output_dir)
+    except OSError:
+        return have
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(".whl"):
+                continue
+            try:
+                name, version, _, _ = parse_wheel_filename(entry.name)
+            except Exception:
+                continue
+            have.add((canonicalize_name(name), str(version)))
+    return have
+
+
+def _spec_is_downloaded(spec: str, have: set) -> bool:
+    """True if an exact ==version spec is already satisfied on disk."""
+    try:
+        req = Requirement(spec)
+    except Exception:
+        return False
+    pins = [s.version for s in req.specifier if s.operator == "=="]
+    if len(pins) != 1:
+        # Unpinned "latest" specs always go to pip; it resolves them
+        return False
+    return (canonicalize_name(req.name), pins[0]) in have
+
+
+def resolve_requirement_specs(
+    req_string: str,
+    max_versions: int = 5,
+    prefetched_versions: dict[tuple[str, str], list[str]] = None,
+) -> list[str]:
+    """Resolve a single requirement into concrete pip download specs."""
+    # Buffer per-requirement progress and emit it in a single write instead
+    # of one syscall per line
+    out = []
     try:
         req = Requirement(req_string)
         package_name = req.name
         specifier = req.specifier if req.specifier else SpecifierSet()
         extras = list(req.extras) if req.extras else []
 
-        print(f"\nProcessing: {package_name} {specifier}")
+        out.append(f"\nProcessing: {package_name} {specifier}")
         if extras:
-            print(f"  Extras: {extras}")
+            out.append(f"  Extras: {extras}")
 
         # Skip certain packages that should be built from source
-        skip_packages = {
-            "torch",
-            "torchvision",
-            "torchaudio",
-            "triton",
-            "amdsmi",
-            "vllm",
-        }
-        if package_name.lower() in skip_packages:
-            print("  Skipping (built from source)")
-            return
+        if package_name.lower() in SKIP_PACKAGES:
+            out.append("  Skipping (built from source)")
+            return []
 
-        # Handle packages with markers (platform-specific)
+        # Handle packages with markers (platform-specific): evaluate against
+        # the running environment and skip before any PyPI lookup happens
         if req.marker:
-            print(f"  Marker: {req.marker}")
+            out.append(f"  Marker: {req.marker}")
+            if not req.marker.evaluate():
+                out.append("  Skipping (marker not satisfied)")
+                return []
+
+        def lookup_versions() -> list[str]:
+            # Keyed by (name, specifier): a bare name would collide when the
+            # same package appears under two different ranges
+            key = (package_name, str(specifier))
+            if prefetched_versions and key in prefetched_versions:
+                return prefetched_versions[key]
+            return get_pypi_package_versions(package_name, specifier)
 
         # Get matching versions from PyPI
         if specifier:
-            versions = get_pypi_package_versions(package_name, specifier)
+            versions = lookup_versions()
             selected_versions = select_versions_to_download(versions, max_versions)
 
             if selected_versions:
-                print(
+                out.append(
                     f"  Found {len(versions)} matching versions, "
                     f"downloading {len(selected_versions)}"
                 )
-                download_wheels(
-                    package_name, selected_versions, output_dir, python_version, extras
-                )
-            else:
-                print("  No matching versions found, downloading latest...")
-                download_wheels(
-                    package_name, ["latest"], output_dir, python_version, extras
-                )
-        else:
-            # No version specified, download latest
-            print("  No version specifier, downloading latest...")
-            versions = get_pypi_package_versions(package_name, SpecifierSet())
-            if versions:
-                download_wheels(
-                    package_name, [versions[0]], output_dir, python_version, extras
-                )
-            else:
-                download_wheels(
-                    package_name, ["latest"], output_dir, python_version, extras
-                )
+                return [
+                    _build_package_spec(package_name, version, extras)
+                    for version in selected_versions
+                ]
+
+            out.append("  No matching versions found, downloading latest...")
+            return [_build_package_spec(package_name, extras=extras)]
+
+        # No version specified, download latest
+        out.append("  No version specifier, downloading latest...")
+        versions = lookup_versions()
+        if versions:
+            return [_build_package_spec(package_name, versions[0], extras)]
+        return [_build_package_spec(package_name, extras=extras)]
 
     except Exception as e:
         print(f"Error processing requirement '{req_string}': {e}", file=sys.stderr)
+        return []
+    finally:
+        if out:
+            log.info('\n'.join(out))
 
 
 def download_with_base_wheels(
@@ -278,50 +656,95 @@ def download_with_base_wheels(
 
         # Create venv using current Python
         print(f"  venv location: {venv_dir}")
-        result = subprocess.run(
-            [sys.executable, "-m", "venv", str(venv_dir)],
-            capture_output=True,
-            text=True,
-        )
+        # uv venv is near-instant; --seed installs pip into it because the
+        # final download step below still needs the venv's pip. Stdout is
+        # discarded and only stderr buffered, same as _run_pip_download.
+        # The fallback builds the venv in-process with EnvBuilder instead of
+        # spawning python -m venv, saving an interpreter startup; symlinks
+        # on Unix avoid copying the base interpreter, and upgrade_deps
+        # brings pip current from the bundled ensurepip wheel rather than a
+        # PyPI round trip.
+        if _UV:
+            result = subprocess.run(
+                [_UV, "venv", "--seed", str(venv_dir)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
 
-        if result.returncode != 0:
-            print(f"ERROR: Failed to create venv", file=sys.stderr)
-            print(result.stderr, file=sys.stderr)
-            sys.exit(1)
+            if result.returncode != 0:
+                print(f"ERROR: Failed to create venv", file=sys.stderr)
+                print(result.stderr, file=sys.stderr)
+                sys.exit(1)
+        else:
+            try:
+                venv.EnvBuilder(
+                    with_pip=True,
+                    symlinks=(os.name != 'nt'),
+                    upgrade_deps=True,
+                ).create(str(venv_dir))
+            except Exception as e:
+                print(f"ERROR: Failed to create venv: {e}", file=sys.stderr)
+                sys.exit(1)
 
         print("  ✓ Virtual environment created")
 
         # Determine pip path in venv
         if os.name == 'nt':  # Windows
-            pip_path = venv_dir / "Scripts" / "pip"
+            bin_dir = venv_dir / "Scripts"
         else:  # Unix/Linux
-            pip_path = venv_dir / "bin" / "pip"
-
-        # Upgrade pip in venv
-        print("  Upgrading pip in venv...")
-        subprocess.run(
-            [str(pip_path), "install", "--upgrade", "pip"],
-            capture_output=True,
-            check=True,
-        )
-        print("  ✓ pip upgraded")
+            bin_dir = venv_dir / "bin"
+        pip_path = bin_dir / "pip"
+        venv_python = bin_dir / "python"
+
+        # The venv never outlives this function, so suppress bytecode
+        # writes from anything pip itself imports or runs inside it
+        venv_env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
 
         # Install base wheels into venv (without dependencies)
         print()
         print("Installing base wheels into venv (this may take a few minutes)...")
-        for wheel in base_wheels:
-            print(f"  Installing {wheel.name}...")
+
+        def install_wheel(wheel: Path) -> None:
+            log.info("  Installing %s...", wheel.name)
+            # pip can emit megabytes of progress output for large ROCm
+            # wheels; send it to /dev/null instead of buffering it, and
+            # keep only stderr for the failure message. --no-compile skips
+            # bytecode generation — the venv is discarded right after the
+            # download step (uv skips bytecode compilation by default).
+            if _UV:
+                cmd = [
+                    _UV, "pip", "install",
+                    "--no-deps", "--quiet",
+                    "--python", str(venv_python),
+                    str(wheel),
+                ]
+            else:
+                cmd = [
+                    str(pip_path), "install",
+                    "--no-deps", "--no-compile", "--quiet",
+                    str(wheel),
+                ]
             result = subprocess.run(
-                [str(pip_path), "install", "--no-deps", str(wheel)],
-                capture_output=True,
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
+                env=venv_env,
             )
 
             if result.returncode != 0:
-                print(f"  WARNING: Failed to install {wheel.name}", file=sys.stderr)
-                print(result.stderr, file=sys.stderr)
+                log.warning("  WARNING: Failed to install %s\n%s",
+                            wheel.name, result.stderr)
             else:
-                print(f"  ✓ {wheel.name} installed")
+                log.info("  ✓ %s installed", wheel.name)
+
+        # --no-deps makes the wheels independent of each other, so their
+        # unpack/copy phases can overlap
+        with ThreadPoolExecutor(
+            max_workers=min(4, len(base_wheels))
+        ) as executor:
+            list(executor.map(install_wheel, base_wheels))
 
         print()
         print("Base wheels installed successfully!")
@@ -353,6 +776,7 @@ def download_with_base_wheels(
             cmd,
             capture_output=False,  # Show output in real-time
             text=True,
+            env=venv_env,
         )
 
         if result.returncode != 0:
@@ -401,6 +825,13 @@ def main():
 
     args = parser.parse_args()
 
+    # Single stream handler; set LOG_LEVEL=DEBUG to see per-spec chatter
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"),
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
     # Parse requirements file
     print(f"Parsing requirements from: {args.requirements}")
     requirements = parse_requirements_file(args.requirements)
@@ -441,31 +872,76 @@ def main():
         print("=" * 70)
         print()
 
-        # Process each requirement
+        # Fetch all PyPI metadata concurrently, resolve every requirement to
+        # concrete specs, then hand them to pip in a single batch
+        print("Prefetching PyPI metadata...")
+        prefetched_versions = prefetch_package_versions(requirements)
+
+        all_specs = []
+        transitive_specs = []
         for req_string in requirements:
-            process_requirement(
-                req_string, args.output_dir, args.python_version, args.max_versions
+            specs = resolve_requirement_specs(
+                req_string, args.max_versions, prefetched_versions
             )
+            all_specs.extend(specs)
+            if specs:
+                # Newest selected version; used for the single resolver pass
+                transitive_specs.append(specs[0])
+
+        # Deduplicate while preserving resolution order; the same spec can be
+        # produced by overlapping requirements
+        all_specs = list(dict.fromkeys(all_specs))
+        transitive_specs = list(dict.fromkeys(transitive_specs))
+
+        # On retry runs most wheels are already on disk; drop any exact pin
+        # that is already satisfied so pip is not asked to re-request it
+        have = _scan_downloaded_wheels(args.output_dir)
+        if have:
+            before = len(all_specs)
+            all_specs = [s for s in all_specs if not _spec_is_downloaded(s, have)]
+            if before != len(all_specs):
+                print(
+                    f"Skipping {before - len(all_specs)} spec(s) already "
+                    f"present in {args.output_dir}"
+                )
+
+        if all_specs:
+            # Two passes: the exact pins are fetched with --no-deps so no
+            # dependency closure is resolved per version (the specs are
+            # wave-batched downstream, since pip refuses two pins of one
+            # package in a single invocation either way), then one ordinary
+            # pass over the newest version of each package pulls the
+            # transitive closure exactly once instead of per version.
+            download_package_specs(all_specs, args.output_dir, no_deps=True)
+            download_package_specs(transitive_specs, args.output_dir)
+
+    # Summary: one scandir pass collects both the wheel count and the
+    # normalized package names without per-file stat calls or Path objects
+    wheel_count = 0
+    downloaded_packages = set()
+    with os.scandir(args.output_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.whl'):
+                wheel_count += 1
+                # Derive the canonical package name via packaging rather
+                # than ad-hoc stem splitting, which misnormalizes names and
+                # causes false "missing critical packages" failures
+                try:
+                    name, _, _, _ = parse_wheel_filename(entry.name)
+                except Exception:
+                    continue
+                downloaded_packages.add(canonicalize_name(name))
 
-    # Summary
-    wheels = list(args.output_dir.glob("*.whl"))
     print(f"\n{'=' * 60}")
-    print(f"Downloaded {len(wheels)} wheels to {args.output_dir}")
+    print(f"Downloaded {wheel_count} wheels to {args.output_dir}")
     print(f"{'=' * 60}")
 
     # Validate critical packages were downloaded (including key transitive dependencies)
-    CRITICAL_PACKAGES = {
+    CRITICAL_PACKAGES = {canonicalize_name(pkg) for pkg in (
         'regex', 'numpy', 'transformers', 'tokenizers', 'protobuf',
         'pydantic', 'aiohttp', 'requests', 'tqdm', 'fastapi',
         'typing-extensions', 'packaging', 'pyyaml', 'anyio'
-    }
-
-    # Get set of downloaded package names (normalized)
-    downloaded_packages = set()
-    for wheel in wheels:
-        # Extract package name from wheel filename (before first hyphen or underscore followed by version)
-        name = wheel.stem.split('-')[0].lower().replace('_', '-')
-        downloaded_packages.add(name)
+    )}
 
     # Check for missing critical packages
     missing_critical = CRITICAL_PACKAGES - downloaded_packages
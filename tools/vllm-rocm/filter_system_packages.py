@@ -12,34 +12,76 @@ This prevents trying to download packages from PyPI that:
 - Have incompatible versions
 """
 
+import json
 import subprocess
 import re
 import sys
 from pathlib import Path
 
+from packaging.utils import canonicalize_name
+
 # Known system packages to exclude (pre-installed in base ROCm image)
 SYSTEM_PACKAGES = {
     'dbus-python', 'pygobject', 'pycairo',
     'distro', 'secretstorage', 'jeepney'
 }
 
+# Canonicalized so spelling variants (DBus-Python, dbus_python) still match
+_NORMALIZED_SYSTEM_PACKAGES = frozenset(
+    canonicalize_name(pkg) for pkg in SYSTEM_PACKAGES
+)
+
+# Compiled once; re.match per line would go through the module-level
+# pattern cache and its lock on every call. Accepts dots so names like
+# ruamel.yaml are captured whole.
+_PKG_RE = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+def _installed_package_locations() -> dict:
+    """Map every installed package to its install location.
+
+    One `pip list` invocation replaces a `pip show` subprocess per
+    dependency line — pip startup (~1 s) dominated the old per-package
+    lookups.
+    """
+    try:
+        result = subprocess.run(
+            ['pip', 'list', '--format=json', '--verbose'],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=30
+        )
+        return {
+            canonicalize_name(p['name']): p.get('location', '')
+            for p in json.loads(result.stdout)
+        }
+    except (subprocess.TimeoutExpired, subprocess.CalledProcessError,
+            json.JSONDecodeError):
+        return {}
+
+
 def filter_system_packages(input_file: str, output_file: str):
     """Filter system packages from dependency list."""
     with open(input_file) as f:
         deps = f.readlines()
 
+    locations = _installed_package_locations()
+
     filtered = []
     excluded = []
 
     for line in deps:
-        # Extract package name from dependency line
-        match = re.match(r'^([a-zA-Z0-9_-]+)', line)
+        # Extract package name from dependency line. Lines that don't start
+        # with a package name (editable -e entries, pip options) can't be
+        # system packages — pass them through untouched
+        match = _PKG_RE.match(line)
         if not match:
+            filtered.append(line)
             continue
-        pkg = match.group(1).lower()
+        pkg = canonicalize_name(match.group(1))
 
         # Check 1: Exclude blacklisted packages
-        if pkg in SYSTEM_PACKAGES:
+        if pkg in _NORMALIZED_SYSTEM_PACKAGES:
             print(f"Excluding blacklisted: {line.strip()}", file=sys.stderr)
             excluded.append(line.strip())
             continue
@@ -47,21 +89,13 @@ def filter_system_packages(input_file: str, output_file: str):
         # Check 2: Check installation location to exclude system-installed packages
         # Only exclude packages in system directories (/usr/lib/python3*/)
         # Keep packages in pip directories (/usr/local/lib/python3.12/)
-        try:
-            result = subprocess.run(
-                ['pip', 'show', pkg],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            # Exclude only if in system Python 3.10 directories
-            if '/usr/lib/python3/dist-packages' in result.stdout or \
-               '/usr/lib/python3.10/dist-packages' in result.stdout:
-                print(f"Excluding system location: {line.strip()}", file=sys.stderr)
-                excluded.append(line.strip())
-                continue
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-            pass
+        # Exclude only if in system Python 3.10 directories
+        location = locations.get(pkg, '')
+        if '/usr/lib/python3/dist-packages' in location or \
+           '/usr/lib/python3.10/dist-packages' in location:
+            print(f"Excluding system location: {line.strip()}", file=sys.stderr)
+            excluded.append(line.strip())
+            continue
 
         filtered.append(line)
 
@@ -22,12 +22,69 @@ Features:
 """
 
 import argparse
+import functools
+import gzip
 import hashlib
+import io
+import json
+import mmap
+import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Tuple
-from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict, namedtuple
+
+from packaging.version import InvalidVersion, Version
+
+# A wheel's filename parsed exactly once; main() builds these and every
+# later stage works from the fields instead of re-splitting the filename
+WheelInfo = namedtuple("WheelInfo", "path dist version python_tag")
+
+# PEP 503 name normalization pattern, compiled once instead of going
+# through re's internal cache lookup on every call
+_NORM_RE = re.compile(r"[-_.]+")
+
+# Constant HTML fragments for the simple indexes; only the per-wheel anchor
+# line is formatted inside the loops
+INDEX_HEADER = """\
+<!DOCTYPE html>
+<html>
+<head>
+  <title>{title}</title>
+</head>
+<body>
+  <h1>{title}</h1>
+"""
+
+INDEX_FOOTER = """\
+</body>
+</html>"""
+
+ANCHOR_TMPL = '  <a {attrs}>{name}</a><br/>\n'
+
+
+def iter_wheels(root: Path):
+    """
+    Yield every wheel file under root.
+
+    An iterative os.scandir walk avoids the Path object churn and extra
+    stat calls of Path.rglob; directory-vs-file checks come straight from
+    the DirEntry, which caches them.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".whl"):
+                    yield Path(entry.path)
 
 
 def normalize_package_name(name: str) -> str:
@@ -43,7 +100,7 @@ def normalize_package_name(name: str) -> str:
     Returns:
         str: Normalized package name
     """
-    return re.sub(r"[-_.]+", "-", name).lower()
+    return _NORM_RE.sub("-", name).lower()
 
 
 def extract_wheel_metadata(wheel_path: Path) -> Tuple[str, str, str]:
@@ -87,13 +144,143 @@ def extract_wheel_metadata(wheel_path: Path) -> Tuple[str, str, str]:
 
 def calculate_sha256(file_path: Path) -> str:
     """Calculate SHA256 hash of a file."""
-    sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        # file_digest (Python 3.11+) feeds OpenSSL's accelerated SHA256
+        # (SHA-NI where available) through a zero-copy buffer and releases
+        # the GIL around updates
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        # Older interpreters: hash the file as one mapped buffer — a single
+        # C-level update with kernel demand paging instead of a Python read
+        # loop
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+        except (ValueError, OSError):
+            # Empty file or mmap unavailable; fall through to chunked reads
+            pass
+
+        sha256_hash = hashlib.sha256()
+        # 128 KiB blocks: 4 KiB meant ~250k read() syscalls per GB and
+        # starved the hash of data the kernel readahead already had
+        for byte_block in iter(lambda: f.read(1 << 17), b""):
             sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+        return sha256_hash.hexdigest()
+
+
+def _hash_cache_key(wheel_path: Path) -> str:
+    """Cache key identifying a wheel's content without reading it."""
+    stat = wheel_path.stat()
+    return f"{wheel_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_hash_cache(cache_path: Path) -> Dict[str, str]:
+    """Load the on-disk digest cache; a missing or corrupt cache is empty."""
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+        if isinstance(cache, dict):
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_hash_cache(cache_path: Path, cache: Dict[str, str]) -> None:
+    """Write the digest cache back to disk (best-effort)."""
+    try:
+        with open(cache_path, "w") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        print(f"Warning: Could not write hash cache: {e}", file=sys.stderr)
+
+
+def calculate_all_hashes(
+    wheels: List[Path],
+    cache: Optional[Dict[str, str]] = None,
+    hash_func=calculate_sha256,
+) -> Dict[Path, str]:
+    """
+    Hash all wheels concurrently across CPU cores.
+
+    Hashing hundreds of multi-hundred-MB ROCm wheels sequentially scales
+    linearly with total bytes, so wheels are hashed concurrently and the
+    per-package index generation below becomes pure dict lookups. Threads
+    suffice for parallelism here: OpenSSL releases the GIL inside each
+    SHA256 update, so workers overlap hashing and disk reads without the
+    process-spawn and pickling cost of a process pool.
+
+    Wheels whose (name, size, mtime_ns) key is already in the cache skip
+    hashing entirely, turning repeat index runs into O(new bytes). The cache
+    dict is updated in place with freshly computed digests.
+
+    Returns:
+        Dict mapping wheel paths to their SHA256 hex digests. Wheels that
+        failed to hash are absent from the dict.
+    """
+    digests: Dict[Path, str] = {}
+    to_hash = []
+    keys: Dict[Path, str] = {}
+
+    for wheel_path in wheels:
+        try:
+            key = _hash_cache_key(wheel_path)
+        except OSError:
+            to_hash.append(wheel_path)
+            continue
+        keys[wheel_path] = key
+        if cache is not None and key in cache:
+            digests[wheel_path] = cache[key]
+        else:
+            to_hash.append(wheel_path)
+
+    if not to_hash:
+        return digests
+
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        futures = {executor.submit(hash_func, w): w for w in to_hash}
+        for future in as_completed(futures):
+            wheel_path = futures[future]
+            try:
+                digest = future.result()
+            except Exception as e:
+                print(
+                    f"Warning: Could not calculate hash for {wheel_path.name}: {e}",
+                    file=sys.stderr,
+                )
+                continue
+            digests[wheel_path] = digest
+            if cache is not None and wheel_path in keys:
+                cache[keys[wheel_path]] = digest
+    return digests
+
+
+def calculate_s3_etag(file_path: Path, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """
+    Compute the ETag S3 assigns to a multipart upload of this file.
 
+    Files at or below one part hash to a plain MD5; larger files hash each
+    part with MD5 and the ETag is the MD5 of the concatenated part digests
+    plus "-<parts>". MD5 is cheaper than SHA256 on CPUs without SHA-NI, and
+    the result can be compared directly against S3 listings to detect
+    unchanged wheels.
+    """
+    whole = hashlib.md5()
+    part_digests = []
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            whole.update(chunk)
+            part_digests.append(hashlib.md5(chunk).digest())
 
+    if len(part_digests) <= 1:
+        return whole.hexdigest()
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+# Only a handful of distinct tags show up across thousands of wheels
+# (cp310, cp312, py3, ...), so memoize the parse down to a dict lookup
+@functools.lru_cache(maxsize=None)
 def python_tag_to_requires_python(python_tag: str) -> str:
     """
     Convert Python tag from wheel to requires-python metadata.
@@ -137,36 +324,49 @@ def python_tag_to_requires_python(python_tag: str) -> str:
 
 def generate_package_index(
     package_name: str,
-    wheels: List[Path],
+    wheels: List[WheelInfo],
     base_url: str,
     add_hashes: bool = True,
     add_metadata: bool = True,
+    digests: Optional[Dict[Path, str]] = None,
+    hash_source: str = "sha256",
 ) -> str:
     """
     Generate HTML index for a single package.
 
     Args:
         package_name: Normalized package name
-        wheels: List of wheel files for this package
+        wheels: Parsed WheelInfo entries for this package
         base_url: Base S3 URL for wheels
         add_hashes: Whether to add SHA256 hashes
         add_metadata: Whether to add metadata attributes
+        digests: Precomputed digests (see calculate_all_hashes); wheels
+            missing from the dict are hashed inline
+        hash_source: "sha256" for the standard PEP 503 attribute, "etag"
+            for the cheaper S3 multipart ETag, or "none" to skip hashing
 
     Returns:
         str: HTML content for package index
     """
-    html_lines = [
-        "<!DOCTYPE html>",
-        "<html>",
-        "<head>",
-        f"  <title>Links for {package_name}</title>",
-        "</head>",
-        "<body>",
-        f"  <h1>Links for {package_name}</h1>",
-    ]
+    buf = io.StringIO()
+    buf.write(INDEX_HEADER.format(title=f"Links for {package_name}"))
+
+    # Accumulated and emitted as one stderr write after the loop; a print
+    # per failing wheel means a locked, flushing syscall each time
+    warnings = []
+
+    # Sort newest-first on the real version ordering — a lexicographic name
+    # sort would put 1.9.0 after 1.10.0. Unparseable versions sort last but
+    # are still listed.
+    def _version_key(info):
+        try:
+            return Version(info.version)
+        except InvalidVersion:
+            return Version("0")
 
     # Process each wheel
-    for wheel_path in sorted(wheels, reverse=True):  # Newest first (by name, crude but works)
+    for info in sorted(wheels, key=_version_key, reverse=True):
+        wheel_path = info.path
         wheel_name = wheel_path.name
         wheel_url = f"{base_url}/packages/{wheel_name}"
 
@@ -174,30 +374,37 @@ def generate_package_index(
         attributes = [f'href="{wheel_url}"']
 
         if add_metadata:
-            try:
-                _, _, python_tag = extract_wheel_metadata(wheel_path)
-                requires_python = python_tag_to_requires_python(python_tag)
-                if requires_python:
-                    attributes.append(f'data-requires-python="{requires_python}"')
-            except Exception as e:
-                print(f"Warning: Could not extract metadata from {wheel_name}: {e}", file=sys.stderr)
-
-        if add_metadata:
-            try:
-                sha256 = calculate_sha256(wheel_path)
-                attributes.append(f'data-dist-info-metadata="sha256={sha256}"')
-            except Exception as e:
-                print(f"Warning: Could not calculate hash for {wheel_name}: {e}", file=sys.stderr)
+            requires_python = python_tag_to_requires_python(info.python_tag)
+            if requires_python:
+                attributes.append(f'data-requires-python="{requires_python}"')
+
+            if hash_source != "none":
+                try:
+                    if digests is not None and wheel_path in digests:
+                        digest = digests[wheel_path]
+                    elif hash_source == "etag":
+                        digest = calculate_s3_etag(wheel_path)
+                    else:
+                        digest = calculate_sha256(wheel_path)
+                    if hash_source == "etag":
+                        # Not a pip-verified hash, but lets tooling compare
+                        # the index against S3 listings without re-hashing
+                        attributes.append(f'data-s3-etag="{digest}"')
+                    else:
+                        attributes.append(f'data-dist-info-metadata="sha256={digest}"')
+                except Exception as e:
+                    warnings.append(
+                        f"Warning: Could not calculate hash for {wheel_name}: {e}"
+                    )
 
         # Add the link
-        html_lines.append(f'  <a {" ".join(attributes)}>{wheel_name}</a><br/>')
+        buf.write(ANCHOR_TMPL.format(attrs=" ".join(attributes), name=wheel_name))
 
-    html_lines.extend([
-        "</body>",
-        "</html>",
-    ])
+    if warnings:
+        sys.stderr.write("\n".join(warnings) + "\n")
 
-    return "\n".join(html_lines)
+    buf.write(INDEX_FOOTER)
+    return buf.getvalue()
 
 
 def generate_main_index(packages: List[str]) -> str:
@@ -210,25 +417,36 @@ def generate_main_index(packages: List[str]) -> str:
     Returns:
         str: HTML content for main index
     """
-    html_lines = [
-        "<!DOCTYPE html>",
-        "<html>",
-        "<head>",
-        "  <title>Simple Index</title>",
-        "</head>",
-        "<body>",
-        "  <h1>Simple Index</h1>",
-    ]
+    buf = io.StringIO()
+    buf.write(INDEX_HEADER.format(title="Simple Index"))
 
     for package_name in sorted(packages):
-        html_lines.append(f'  <a href="{package_name}/">{package_name}</a><br/>')
+        buf.write(
+            ANCHOR_TMPL.format(
+                attrs=f'href="{package_name}/"', name=package_name
+            )
+        )
 
-    html_lines.extend([
-        "</body>",
-        "</html>",
-    ])
+    buf.write(INDEX_FOOTER)
+    return buf.getvalue()
 
-    return "\n".join(html_lines)
+
+def write_index_html(directory: Path, html: str) -> None:
+    """
+    Write index.html plus a pre-compressed index.html.gz next to it.
+
+    The repeated anchor tags and S3 URLs compress 5-10x, so serving the
+    .gz variant with Content-Encoding: gzip cuts the bytes pip fetches on
+    every install; compressing once at build time costs nothing per user.
+
+    Args:
+        directory: Directory to place the index files in
+        html: HTML content for the index
+    """
+    (directory / "index.html").write_text(html)
+    (directory / "index.html.gz").write_bytes(
+        gzip.compress(html.encode(), compresslevel=9)
+    )
 
 
 def generate_landing_page(
@@ -384,6 +602,20 @@ def main():
         action="store_true",
         help="Skip generating SHA256 hashes"
     )
+    parser.add_argument(
+        "--hash-source",
+        choices=["sha256", "etag", "none"],
+        default="sha256",
+        help="Digest to embed per wheel: sha256 (pip-verifiable, default), "
+             "etag (cheaper S3 multipart ETag for change detection), or "
+             "none to skip hashing entirely"
+    )
+    parser.add_argument(
+        "--hash-cache",
+        type=Path,
+        help="JSON file caching wheel digests between runs; unchanged wheels "
+             "(same name, size and mtime) are not re-hashed"
+    )
     parser.add_argument(
         "--no-metadata",
         action="store_true",
@@ -419,7 +651,7 @@ def main():
 
     # Find all wheels
     print("Collecting wheels...")
-    all_wheels = list(args.wheels_dir.rglob("*.whl"))
+    all_wheels = list(iter_wheels(args.wheels_dir))
 
     if not all_wheels:
         print(f"ERROR: No wheels found in {args.wheels_dir}", file=sys.stderr)
@@ -427,47 +659,80 @@ def main():
 
     print(f"Found {len(all_wheels)} wheel(s)")
 
-    # Group wheels by package name
-    packages: Dict[str, List[Path]] = defaultdict(list)
+    # Parse each filename once and group the WheelInfo entries by package;
+    # everything downstream works from the parsed fields
+    packages: Dict[str, List[WheelInfo]] = defaultdict(list)
 
+    skip_warnings = []
     for wheel_path in all_wheels:
         try:
-            pkg_name, _, _ = extract_wheel_metadata(wheel_path)
+            pkg_name, version, python_tag = extract_wheel_metadata(wheel_path)
             normalized_name = normalize_package_name(pkg_name)
-            packages[normalized_name].append(wheel_path)
+            packages[normalized_name].append(
+                WheelInfo(wheel_path, pkg_name, version, python_tag)
+            )
         except Exception as e:
-            print(f"Warning: Skipping {wheel_path.name}: {e}", file=sys.stderr)
+            skip_warnings.append(f"Warning: Skipping {wheel_path.name}: {e}")
+    if skip_warnings:
+        sys.stderr.write("\n".join(skip_warnings) + "\n")
 
     print(f"Grouped into {len(packages)} package(s)")
 
+    # Hash everything up front across all cores; the per-package loop below
+    # then only does dict lookups
+    hash_source = "none" if args.no_hashes else args.hash_source
+    digests: Dict[Path, str] = {}
+    if not args.no_metadata and hash_source != "none":
+        print(f"\nCalculating {hash_source} digests...")
+        # The on-disk cache stores sha256 digests only; etag runs hash inline
+        hash_cache = None
+        if args.hash_cache and hash_source == "sha256":
+            hash_cache = load_hash_cache(args.hash_cache)
+        hash_func = calculate_s3_etag if hash_source == "etag" else calculate_sha256
+        digests = calculate_all_hashes(
+            all_wheels, cache=hash_cache, hash_func=hash_func
+        )
+        if hash_cache is not None:
+            save_hash_cache(args.hash_cache, hash_cache)
+        print(f"  ✓ Hashed {len(digests)} wheel(s)")
+
     # Create output directory structure
     simple_dir = args.output_dir / "simple"
     simple_dir.mkdir(parents=True, exist_ok=True)
 
     print("\nGenerating package indexes...")
 
-    # Generate index for each package
+    # Generate all the HTML first, then flush the files through a thread
+    # pool: each write is a tiny open/write/close whose syscall latency (on
+    # CI overlayfs especially) would otherwise be paid serially per package
+    outputs = []
     for pkg_name, wheels in packages.items():
-        pkg_dir = simple_dir / pkg_name
-        pkg_dir.mkdir(exist_ok=True)
-
         index_html = generate_package_index(
             pkg_name,
             wheels,
             args.s3_url,
             add_hashes=not args.no_hashes,
             add_metadata=not args.no_metadata,
+            digests=digests,
+            hash_source=hash_source,
         )
+        outputs.append((pkg_name, simple_dir / pkg_name, index_html))
+
+    def write_package_index(output):
+        pkg_name, pkg_dir, index_html = output
+        pkg_dir.mkdir(exist_ok=True)
+        write_index_html(pkg_dir, index_html)
 
-        index_path = pkg_dir / "index.html"
-        index_path.write_text(index_html)
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        list(executor.map(write_package_index, outputs))
 
-        print(f"  ✓ {pkg_name} ({len(wheels)} wheel(s))")
+    for pkg_name, _, _ in outputs:
+        print(f"  ✓ {pkg_name} ({len(packages[pkg_name])} wheel(s))")
 
     # Generate main index
     print("\nGenerating main index...")
     main_index = generate_main_index(list(packages.keys()))
-    (simple_dir / "index.html").write_text(main_index)
+    write_index_html(simple_dir, main_index)
     print("  ✓ simple/index.html")
 
     # Generate landing page
@@ -80,18 +80,23 @@ def normalize_wheel_filename(wheel_path: Path) -> Path:
     return new_path
 
 
-def normalize_wheels_in_directory(directory: Path, dry_run: bool = False) -> dict:
+def normalize_wheels_in_directory(
+    directory: Path, dry_run: bool = False, wheels: list = None
+) -> dict:
     """
     Normalize all wheel filenames in a directory.
 
     Args:
         directory: Directory containing wheel files
         dry_run: If True, only print what would be done without actually renaming
+        wheels: Wheels to process, if the caller already discovered them;
+            otherwise the directory is globbed here
 
     Returns:
         dict: Statistics about the normalization process
     """
-    wheels = list(directory.glob("*.whl"))
+    if wheels is None:
+        wheels = list(directory.glob("*.whl"))
 
     if not wheels:
         print(f"No wheel files found in {directory}")
@@ -186,16 +191,17 @@ def main():
 
     # Process directories
     if args.recursive:
-        # Find all subdirectories containing wheels
-        directories = set()
+        # Single walk: group wheels by parent directory as they are found,
+        # instead of one rglob to discover directories plus a glob per directory
+        wheels_by_dir = {}
         for wheel in args.directory.rglob("*.whl"):
-            directories.add(wheel.parent)
+            wheels_by_dir.setdefault(wheel.parent, []).append(wheel)
 
-        if not directories:
+        if not wheels_by_dir:
             print(f"No wheels found in {args.directory} or its subdirectories")
             sys.exit(0)
 
-        print(f"Found wheels in {len(directories)} directory(ies)\n")
+        print(f"Found wheels in {len(wheels_by_dir)} directory(ies)\n")
 
         total_stats = {
             "total": 0,
@@ -204,9 +210,10 @@ def main():
             "errors": 0
         }
 
-        for directory in sorted(directories):
+        for directory in sorted(wheels_by_dir):
             print(f"Processing {directory.relative_to(args.directory) if directory != args.directory else directory}...")
-            stats = normalize_wheels_in_directory(directory, args.dry_run)
+            stats = normalize_wheels_in_directory(
+                directory, args.dry_run, wheels=wheels_by_dir[directory])
 
             # Aggregate stats
             for key in total_stats:
@@ -6,15 +6,49 @@ Script to organize wheels by size for GitHub Pages (<100MB) and GitHub Releases
 Optimized for minimal disk space usage using move + symlinks.
 """
 
+import errno
 import os
 import sys
 import shutil
 import time
+from stat import S_ISREG
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 SIZE_LIMIT = 100 * 1024 * 1024  # 100MB
 
+# Concurrent wheel moves; the work is disk I/O, so overlapping requests lets
+# the kernel keep the device queue full instead of paying per-file latency.
+# Scale with the machine rather than a flat constant — renames are cheap
+# enough that oversubscribing cores by 4x still helps hide syscall latency
+MOVE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def iter_wheels(root):
+    """Walk root with os.fwalk, yielding (path, size) pairs. Sizes are
+    stat'ed relative to the open directory fd (fstatat), so the kernel
+    resolves a single name per wheel instead of re-walking the full path
+    for every entry."""
+    # Resolve the root so fwalk (which never follows symlinks) still works
+    # when the artifacts directory itself is a symlink
+    for dirpath, _dirnames, filenames, dir_fd in os.fwalk(
+            os.path.realpath(str(root))):
+        for name in filenames:
+            if not name.endswith(".whl"):
+                continue
+            try:
+                st = os.stat(name, dir_fd=dir_fd, follow_symlinks=False)
+            except OSError:
+                continue
+            if S_ISREG(st.st_mode):
+                yield Path(dirpath, name), st.st_size
+
+# Block-buffer stdout even when attached to a terminal: the progress loop
+# then hands the CI log pipe whole buffers instead of one write per line,
+# and we flush explicitly at progress checkpoints
+sys.stdout.reconfigure(line_buffering=False, write_through=False)
+
 # Validate environment
 print("Validating environment...")
 if 'GITHUB_OUTPUT' not in os.environ:
@@ -23,15 +57,27 @@ if 'GITHUB_OUTPUT' not in os.environ:
     sys.exit(1)
 print(f"GITHUB_OUTPUT is set to: {os.environ['GITHUB_OUTPUT']}")
 
-# Validate artifacts directory exists
+# Open the outputs file once up front; failing here beats discovering a
+# bad path after all the wheels have been moved
+try:
+    github_output = open(os.environ['GITHUB_OUTPUT'], 'a')
+except OSError as e:
+    print(f"ERROR: Cannot open GITHUB_OUTPUT for append: {e}", file=sys.stderr)
+    sys.exit(1)
+
+# Validate artifacts directory exists. Path.absolute() re-runs getcwd and
+# builds fresh Path objects each call, so resolve cwd once and derive the
+# absolute artifacts path from it
+CWD = Path.cwd()
 artifacts_dir = Path("artifacts")
-print(f"\nChecking for artifacts directory at: {artifacts_dir.absolute()}")
+artifacts_abs = CWD / "artifacts"
+print(f"\nChecking for artifacts directory at: {artifacts_abs}")
 
 if not artifacts_dir.exists():
-    print(f"ERROR: Artifacts directory not found at: {artifacts_dir.absolute()}", file=sys.stderr)
-    print(f"\nCurrent working directory: {Path.cwd()}", file=sys.stderr)
+    print(f"ERROR: Artifacts directory not found at: {artifacts_abs}", file=sys.stderr)
+    print(f"\nCurrent working directory: {CWD}", file=sys.stderr)
     print(f"\nContents of current directory:", file=sys.stderr)
-    for item in sorted(Path.cwd().iterdir()):
+    for item in sorted(CWD.iterdir()):
         print(f"  - {item.name}", file=sys.stderr)
     sys.exit(1)
 
@@ -39,13 +85,17 @@ if not artifacts_dir.is_dir():
     print(f"ERROR: {artifacts_dir} exists but is not a directory!", file=sys.stderr)
     sys.exit(1)
 
-print(f"Artifacts directory found: {artifacts_dir.absolute()}")
+print(f"Artifacts directory found: {artifacts_abs}")
 
 # Create directories
 packages_dir = Path("pypi-repo/packages")
 large_dir = Path("pypi-repo/packages-large")
 small_dir = Path("pypi-repo/packages-small")
 
+# The fallback symlink target below assumes packages/ and packages-small/
+# are siblings; fail loudly if the layout ever changes
+assert packages_dir.parent == small_dir.parent
+
 print("\nCreating output directories...")
 packages_dir.mkdir(parents=True, exist_ok=True)
 large_dir.mkdir(parents=True, exist_ok=True)
@@ -54,10 +104,16 @@ print(f"  - {packages_dir}")
 print(f"  - {large_dir}")
 print(f"  - {small_dir}")
 
-# Find all wheels
+# Find all wheels: one traversal builds the worklist and the running size
+# total, with sizes taken from the directory entries themselves
 print("\nCollecting wheels from artifacts...")
-print(f"Searching in: {artifacts_dir.absolute()}")
-all_wheels = list(artifacts_dir.rglob("*.whl"))
+print(f"Searching in: {artifacts_abs}")
+wheel_entries = []
+total_wheel_size = 0
+for wheel_entry in iter_wheels(artifacts_dir):
+    wheel_entries.append(wheel_entry)
+    total_wheel_size += wheel_entry[1]
+all_wheels = [w for w, _ in wheel_entries]
 total = len(all_wheels)
 
 if total == 0:
@@ -75,13 +131,17 @@ if total == 0:
 
 print(f"Found {total} wheels to process")
 
-# Check disk space (optimized calculation for move+symlink approach)
-total_wheel_size = sum(w.stat().st_size for w in all_wheels)
+# Check disk space (optimized calculation for move+symlink approach).
+# The wheel size total was accumulated during discovery, so only the
+# statvfs below costs anything here
 stat = shutil.disk_usage(".")
 free_gb = stat.free / (1024**3)
 
 # With move+symlink approach, we only need ~1.1x the wheel size
-# (not 1.5x or 2x, since we're moving not copying)
+# (not 1.5x or 2x, since we're moving not copying). The estimate is one
+# multiplication on the cached total, so it is never worth skipping —
+# a fixed free-space threshold would wave through workloads bigger than
+# the headroom it assumes
 needed_gb = total_wheel_size / (1024**3) * 1.1  # 1.1x for filesystem overhead
 
 print(f"\nDisk Space Check:")
@@ -101,26 +161,55 @@ print(f"{'='*70}")
 print("Processing wheels (using move + symlink for space efficiency)...")
 print(f"{'='*70}\n")
 
-large_count = 0
-small_count = 0
-large_total_size = 0
-small_total_size = 0
 start_time = time.time()
-last_progress_time = start_time
 
-for i, wheel in enumerate(all_wheels, 1):
-    try:
-        size = wheel.stat().st_size
-        size_mb = size / (1024*1024)
 
+def _copy_wheel_across_devices(src, dest):
+    """Cross-device copy that stays in the kernel: copy_file_range moves
+    the bytes without a user-space buffer loop (and can reflink on CoW
+    filesystems), then the source is unlinked to complete the move."""
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while os.copy_file_range(src_fd, dst_fd, 1 << 30):
+                pass
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    os.unlink(src)
+
+
+def move_wheel(src, dest):
+    """Rename src to dest, with an in-kernel copy across filesystems.
+
+    os.replace is one rename(2) with none of shutil.move's Python-side
+    stat and path juggling; artifacts/ and pypi-repo/ share a filesystem
+    on the runners, so the fallback only fires on unusual mounts.
+    """
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        try:
+            _copy_wheel_across_devices(src, dest)
+        except OSError:
+            # Some mount combinations refuse copy_file_range; let shutil
+            # do the user-space copy as the last resort
+            shutil.move(str(src), str(dest))
+
+
+def process_wheel(entry):
+    """Move one wheel into its size bucket; returns (size, error)."""
+    wheel, size = entry
+    try:
         # Determine destination(s) and move/symlink
         if size > SIZE_LIMIT:
             # Large wheels: MOVE to packages-large/ (frees space from artifacts/)
             dest = large_dir / wheel.name
-            shutil.move(str(wheel), str(dest))
-            large_count += 1
-            large_total_size += size
-            operation = "moved -> packages-large/"
+            move_wheel(wheel, dest)
         else:
             # Small wheels: MOVE to packages/, SYMLINK in packages-small/
             # This uses only 1× space instead of 2×
@@ -128,53 +217,106 @@ for i, wheel in enumerate(all_wheels, 1):
             symlink_dest = small_dir / wheel.name
 
             # Move to primary location (packages/)
-            shutil.move(str(wheel), str(primary_dest))
-
-            # Create relative symlink in packages-small/
-            # Use relative path so symlink works regardless of absolute paths
-            relative_path = os.path.relpath(primary_dest, small_dir)
-            os.symlink(relative_path, symlink_dest)
-
-            small_count += 1
-            small_total_size += size
-            operation = "moved -> packages/ + symlinked -> packages-small/"
+            move_wheel(wheel, primary_dest)
+
+            # Hardlink into packages-small/: one link(2) syscall, still
+            # zero extra bytes on disk. Fall back to a relative symlink
+            # where hardlinks aren't permitted (or across filesystems)
+            try:
+                os.link(primary_dest, symlink_dest)
+            except OSError:
+                # Sibling directories, so the relative target is always
+                # one level up — no need for os.path.relpath arithmetic
+                os.symlink(f"../packages/{wheel.name}", symlink_dest)
+
+        return size, None
+    except Exception as e:
+        return 0, e
+
+
+def aggregate_moves(results):
+    """Consume move results on the main thread, bucketed by size class.
+
+    Everything in the per-wheel path is a local (LOAD_FAST) and the
+    counters are two-element lists indexed by bucket (0 = small,
+    1 = large), so the loop body carries no global name lookups or
+    per-bucket branching beyond the index computation.
+    """
+    counts = [0, 0]
+    total_sizes = [0, 0]
+    entries = ([], [])
+    dest_dirs = (small_dir, large_dir)
+    warnings = []
+    last_progress_time = start_time
+    last_progress_count = 0
+
+    for i, (wheel, (size, error)) in enumerate(zip(all_wheels, results), 1):
+        if error is not None:
+            # Batched into a single stderr write after the loop
+            warnings.append(
+                f"WARNING: Failed to process {wheel.name}: {error}")
+            continue
+
+        bucket = int(size > SIZE_LIMIT)
+        counts[bucket] += 1
+        total_sizes[bucket] += size
+        entries[bucket].append((dest_dirs[bucket] / wheel.name, size))
+        size_mb = size / (1024*1024)
 
         # Enhanced progress indicator
         current_time = time.time()
         elapsed = current_time - start_time
         time_since_last = current_time - last_progress_time
 
-        # Show progress for: every 10 wheels, large files, last wheel, or every 30 seconds
+        # Progress is wall-clock driven: every ~2 seconds, plus large files
+        # and the final wheel. A count-based trigger would write hundreds of
+        # lines to the CI log when small wheels move in microseconds
         show_progress = (
-            i % 10 == 0 or
             i == total or
-            size > SIZE_LIMIT or
-            time_since_last > 30
+            bucket or
+            time_since_last > 2.0
         )
 
         if show_progress:
             rate = i / elapsed if elapsed > 0 else 0
             eta_seconds = (total - i) / rate if rate > 0 else 0
             pct = i * 100 // total
+            since_last = i - last_progress_count
 
             # Truncate filename if too long
             display_name = wheel.name[:50] + "..." if len(wheel.name) > 53 else wheel.name
 
             print(f"[{elapsed:.0f}s] {i}/{total} ({pct}%) | "
                   f"{display_name} ({size_mb:.1f}MB) | "
+                  f"+{since_last} since last | "
                   f"Rate: {rate:.2f}/s | ETA: {eta_seconds:.0f}s")
+            sys.stdout.flush()
 
             last_progress_time = current_time
+            last_progress_count = i
+
+    return counts, total_sizes, entries, warnings
 
-    except Exception as e:
-        print(f"WARNING: Failed to process {wheel.name}: {e}", file=sys.stderr)
+
+# The workers only move files; counters and progress are aggregated on the
+# main thread as ordered results stream back, so no locking is needed
+with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+    counts, total_sizes, entries, failure_warnings = aggregate_moves(
+        executor.map(process_wheel, wheel_entries))
+
+small_count, large_count = counts
+small_total_size, large_total_size = total_sizes
+small_entries, large_entries = entries
+
+if failure_warnings:
+    sys.stderr.write("\n".join(failure_warnings) + "\n")
 
 total_time = time.time() - start_time
 
-# Verify artifacts directory is now empty (all files moved)
-remaining_wheels = list(artifacts_dir.rglob("*.whl"))
-if remaining_wheels:
-    print(f"\nWARNING: {len(remaining_wheels)} wheels remain in artifacts/", file=sys.stderr)
+# The move loop already recorded every wheel that failed, so no rescan of
+# artifacts/ is needed to know what was left behind
+if failure_warnings:
+    print(f"\nWARNING: {len(failure_warnings)} wheels remain in artifacts/", file=sys.stderr)
 else:
     print(f"\nArtifacts directory cleaned: all wheels moved successfully")
 
@@ -192,25 +334,25 @@ print(f"  Actual space used: ~{total_wheel_size/(1024**3):.2f} GB (not {total_wh
 print(f"  Space saved: ~{total_wheel_size/(1024**3):.2f} GB")
 print(f"{'='*70}\n")
 
-# List examples
-large_wheels = sorted(large_dir.glob("*.whl"), key=lambda x: x.stat().st_size, reverse=True)
+# List examples from the sizes recorded during the move loop — no re-glob
+# or re-stat of the destination directories
+large_wheels = sorted(large_entries, key=lambda e: e[1], reverse=True)
 if large_wheels:
     print(f"Largest wheels (showing {min(5, len(large_wheels))} of {len(large_wheels)}):")
-    for w in large_wheels[:5]:
-        size_mb = w.stat().st_size / (1024*1024)
+    for w, size in large_wheels[:5]:
+        size_mb = size / (1024*1024)
         print(f"  - {w.name} ({size_mb:.1f} MB)")
 
-small_sample = list(small_dir.glob("*.whl"))[:5]
+small_sample = small_entries[:5]
 if small_sample:
-    print(f"\nSmall wheels sample (showing 5 of {small_count}):")
-    for w in small_sample:
+    print(f"\nSmall wheels sample (showing {len(small_sample)} of {small_count}):")
+    for w, size in small_sample:
+        size_mb = size / (1024*1024)
         # Check if symlink
         if w.is_symlink():
             target = os.readlink(w)
-            size_mb = w.stat().st_size / (1024*1024)
             print(f"  - {w.name} ({size_mb:.1f} MB) [symlink -> {target}]")
         else:
-            size_mb = w.stat().st_size / (1024*1024)
             print(f"  - {w.name} ({size_mb:.1f} MB)")
 
 # Set output for next steps
@@ -218,8 +360,8 @@ release_tag = f"wheels-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
 
 print(f"\nSetting GitHub Actions output...")
 try:
-    with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
-        f.write(f"release_tag={release_tag}\n")
+    github_output.write(f"release_tag={release_tag}\n")
+    github_output.close()
     print(f"Release tag set: {release_tag}")
     print(f"Successfully wrote to GITHUB_OUTPUT")
 except Exception as e:
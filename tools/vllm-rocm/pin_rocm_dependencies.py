@@ -9,11 +9,16 @@ This ensures that 'pip install vllm' automatically installs the correct custom w
 instead of allowing pip to download different versions from PyPI.
 """
 
-import re
+import functools
+import os
 import sys
 from pathlib import Path
 from typing import Dict, List
 
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+@functools.lru_cache(maxsize=None)
 def extract_version_from_wheel(wheel_name: str) -> str:
     """
     Extract version from wheel filename.
@@ -23,9 +28,12 @@ def extract_version_from_wheel(wheel_name: str) -> str:
         triton-3.4.0-cp312-cp312-linux_x86_64.whl -> 3.4.0
     """
     # Wheel format: {distribution}-{version}(-{build tag})?-{python}-{abi}-{platform}.whl
-    parts = wheel_name.replace('.whl', '').split('-')
+    # Two splits are enough to isolate the version; no need to break the
+    # tag section into its own strings
+    stem = wheel_name[:-4] if wheel_name.endswith('.whl') else wheel_name
+    parts = stem.split('-', 2)
 
-    if len(parts) < 5:
+    if len(parts) < 3:
         raise ValueError(f"Invalid wheel filename format: {wheel_name}")
 
     # Version is the second part
@@ -47,29 +55,45 @@ def get_custom_wheel_versions(install_dir: str) -> Dict[str, str]:
 
     versions = {}
 
-    # Map wheel prefixes to package names
-    # IMPORTANT: Use dashes to avoid matching substrings (e.g., 'torch' would match 'torchvision')
+    # Map the wheel's distribution token (everything before the first dash)
+    # to the package name. Keying on the whole token means one dict lookup
+    # per wheel instead of a startswith test per prefix, and substrings
+    # can't collide ('torch' never matches 'torchvision')
     package_mapping = {
-        'torch-': 'torch',                    # Match torch- (not torchvision)
-        'triton-': 'triton',                  # Match triton- (not triton_kernels)
-        'triton_kernels-': 'triton-kernels',  # Match triton_kernels-
-        'torchvision-': 'torchvision',        # Match torchvision-
-        'amdsmi-': 'amdsmi',                  # Match amdsmi-
-        'flash_attn-': 'flash-attn',          # Match flash_attn-
-        'aiter-': 'aiter',                    # Match aiter-
+        'torch': 'torch',
+        'triton': 'triton',
+        'triton_kernels': 'triton-kernels',
+        'torchvision': 'torchvision',
+        'amdsmi': 'amdsmi',
+        'flash_attn': 'flash-attn',
+        'aiter': 'aiter',
     }
 
-    for wheel_file in install_path.glob('*.whl'):
-        wheel_name = wheel_file.name
-
-        for prefix, package_name in package_mapping.items():
-            if wheel_name.startswith(prefix):
-                try:
-                    version = extract_version_from_wheel(wheel_name)
-                    versions[package_name] = version
-                    print(f"Found {package_name}=={version}", file=sys.stderr)
-                except Exception as e:
-                    print(f"WARNING: Could not extract version from {wheel_name}: {e}", file=sys.stderr)
+    # Only one wheel per package is expected, so track what is still
+    # unresolved and stop scanning once every mapping has been found.
+    # os.scandir reads names straight from the directory without the
+    # pattern matching and Path construction of glob
+    remaining = set(package_mapping)
+
+    with os.scandir(install_path) as it:
+        for entry in it:
+            wheel_name = entry.name
+            if not wheel_name.endswith('.whl'):
+                continue
+
+            head = wheel_name.split('-', 1)[0]
+            if head not in remaining:
+                continue
+            package_name = package_mapping[head]
+            try:
+                version = extract_version_from_wheel(wheel_name)
+                versions[package_name] = version
+                print(f"Found {package_name}=={version}", file=sys.stderr)
+            except Exception as e:
+                print(f"WARNING: Could not extract version from {wheel_name}: {e}", file=sys.stderr)
+
+            remaining.discard(head)
+            if not remaining:
                 break
 
     return versions
@@ -99,14 +123,12 @@ def pin_dependencies_in_requirements(requirements_path: str, versions: Dict[str,
         print(f"ERROR: Requirements file not found: {requirements_path}", file=sys.stderr)
         sys.exit(1)
 
-    # Backup original file
+    # Backup original file: read the content once and mirror it to the
+    # backup in single read_text/write_text calls
     backup_file = requirements_file.with_suffix(requirements_file.suffix + '.bak')
-    with open(requirements_file, 'r') as f:
-        original_lines = f.readlines()
-
-    # Write backup
-    with open(backup_file, 'w') as f:
-        f.writelines(original_lines)
+    original_content = requirements_file.read_text(encoding='utf-8')
+    backup_file.write_text(original_content, encoding='utf-8')
+    original_lines = original_content.splitlines(keepends=True)
 
     # Build header with pinned custom wheels
     header_lines = [
@@ -119,6 +141,10 @@ def pin_dependencies_in_requirements(requirements_path: str, versions: Dict[str,
 
     header_lines.append("\n")  # Blank line separator
 
+    # Canonicalized pin names, so torch, Torch and flash_attn/flash-attn
+    # spellings all resolve to the same key
+    pinned_names = {canonicalize_name(name) for name in versions}
+
     # Filter out any existing entries for custom packages from original file
     filtered_lines = []
     removed_packages = []
@@ -127,27 +153,27 @@ def pin_dependencies_in_requirements(requirements_path: str, versions: Dict[str,
         stripped = line.strip()
         should_keep = True
 
-        # Check if this line is for one of our custom packages
+        # Check if this line is for one of our custom packages. Parse it as
+        # a requirement rather than regex-matching — specifiers, extras and
+        # markers are all handled by packaging, and lines that don't parse
+        # (URLs, options) are kept untouched
         if stripped and not stripped.startswith('#') and not stripped.startswith('-'):
-            for package_name in versions.keys():
-                # Handle both hyphen and underscore variations
-                pattern_name = package_name.replace('-', '[-_]')
-                pattern = rf'^{pattern_name}\s*[=<>]=?\s*[\d.a-zA-Z+]+'
+            try:
+                req = Requirement(stripped.partition(' #')[0])
+            except InvalidRequirement:
+                req = None
 
-                if re.match(pattern, stripped, re.IGNORECASE):
-                    removed_packages.append(f"{package_name}: {stripped}")
-                    should_keep = False
-                    break
+            if req is not None and canonicalize_name(req.name) in pinned_names:
+                removed_packages.append(
+                    f"{canonicalize_name(req.name)}: {stripped}")
+                should_keep = False
 
         if should_keep:
             filtered_lines.append(line)
 
-    # Combine: header + filtered original content
-    final_lines = header_lines + filtered_lines
-
-    # Write modified content
-    with open(requirements_file, 'w') as f:
-        f.writelines(final_lines)
+    # Combine: header + filtered original content, written in one call
+    requirements_file.write_text(
+        ''.join(header_lines + filtered_lines), encoding='utf-8')
 
     # Print summary
     print("\n✓ Inserted custom wheel pins at TOP of requirements:", file=sys.stderr)
@@ -160,6 +160,24 @@ aws s3 sync "$INDEX_DIR/" "s3://$S3_BUCKET/" \
     --cache-control "no-cache, no-store, must-revalidate" \
     --size-only \
     --delete \
+    --exclude "packages/*" \
+    --exclude "*.gz"
+
+# Pre-compressed index variants need Content-Encoding so clients
+# transparently decompress them; sync them in a second pass since the
+# header applies to every object in a sync invocation. --delete removes
+# stale .gz objects when their package index goes away (the first pass
+# excludes *.gz from its deletions); the trailing packages/ exclude wins
+# over the .gz include, keeping wheel objects out of reach
+aws s3 sync "$INDEX_DIR/" "s3://$S3_BUCKET/" \
+    --region "$AWS_REGION" \
+    --content-type "text/html" \
+    --content-encoding "gzip" \
+    --cache-control "no-cache, no-store, must-revalidate" \
+    --size-only \
+    --delete \
+    --exclude "*" \
+    --include "*.gz" \
     --exclude "packages/*"
 
 if [ $? -eq 0 ]; then